@@ -0,0 +1,242 @@
+import itertools
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from stat_archive import COLUMNS, min_to_seconds
+from time_arithmetic import seconds_to_time_str
+
+# -------------------
+# Configuration
+# -------------------
+WORKERS = 1  # one worker runs updates in submit order, so game ids follow click order
+MAX_JOBS_SHOWN = 10
+LEADERBOARD_STATS = ["PTS", "REB", "AST", "STL", "BLK", "+/-"]
+LEADERBOARD_SIZE = 5
+
+Snapshot = namedtuple("Snapshot", ["version", "games", "season_totals", "leaderboards", "game_frames"])
+
+def file_version(path):
+    """(mtime, size) of a file, used to detect writes by other processes."""
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+# -------------------
+# Derived data
+# -------------------
+def build_season_totals(games_data):
+    """Returns {player name: {stat: total}} over all finished games (MIN in seconds)."""
+    totals = {}
+    for game in games_data:
+        if not game.get("finished", True):
+            continue
+        for p in game.get("players", []):
+            t = totals.setdefault(p.get("PLAYER", ""), {col: 0 for col in COLUMNS[1:]})
+            for col in COLUMNS[1:]:
+                t[col] += min_to_seconds(p.get(col, 0)) if col == "MIN" else p.get(col, 0)
+    for t in totals.values():
+        t["PTS"] = t["2PTM"] * 2 + t["3PTM"] * 3 + t["FTM"]
+        t["REB"] = t["OREB"] + t["DREB"]
+    return totals
+
+def build_leaderboards(season_totals):
+    """Returns {stat: [(player name, total), ...]} for the top players per stat."""
+    return {
+        stat: sorted(((name, t[stat]) for name, t in season_totals.items()),
+                     key=lambda item: item[1], reverse=True)[:LEADERBOARD_SIZE]
+        for stat in LEADERBOARD_STATS
+    }
+
+def _pct(makes, attempts):
+    return round(makes / attempts * 100, 1) if attempts > 0 else 0
+
+def _box_score_row(name, min_display, t):
+    """Builds one box score row from summed per-game stats."""
+    fg_makes = t["2PTM"] + t["3PTM"]
+    fg_attempts = t["2PTA"] + t["3PTA"]
+    return {
+        "PLAYER": name,
+        "MIN": min_display,
+        "PTS": t["2PTM"] * 2 + t["3PTM"] * 3 + t["FTM"],
+        "AST": t["AST"],
+        "REB": t["OREB"] + t["DREB"],
+        "OREB": t["OREB"],
+        "DREB": t["DREB"],
+        "TO": t["TO"],
+        "STL": t["STL"],
+        "BLK": t["BLK"],
+        "FG": f"{fg_makes}-{fg_attempts}",
+        "FG%": _pct(fg_makes, fg_attempts),
+        "2PT": f"{t['2PTM']}-{t['2PTA']}",
+        "2FG%": _pct(t["2PTM"], t["2PTA"]),
+        "3PT": f"{t['3PTM']}-{t['3PTA']}",
+        "3FG%": _pct(t["3PTM"], t["3PTA"]),
+        "FT": f"{t['FTM']}-{t['FTA']}",
+        "FT%": _pct(t["FTM"], t["FTA"]),
+        "+/-": t["+/-"],
+        "PF": t["PF"],
+    }
+
+def build_box_score(game):
+    """Returns the box score DataFrame of one game, team total row last."""
+    players = game.get("players", [])
+    rows = [
+        _box_score_row(p.get("PLAYER", ""), p.get("MIN", 0), {col: p.get(col, 0) for col in COLUMNS[2:]})
+        for p in players
+    ]
+    team = {col: sum(p.get(col, 0) for p in players) for col in COLUMNS[3:]}
+    total_seconds = sum(min_to_seconds(p.get("MIN", 0)) for p in players)
+    rows.append(_box_score_row("👥 TEAM TOTAL", seconds_to_time_str(total_seconds), team))
+    return pd.DataFrame(rows)
+
+def build_game_frames(games_data):
+    """Returns {game_id: box score DataFrame} for finished games."""
+    return {
+        game["game_id"]: build_box_score(game)
+        for game in games_data
+        if game.get("finished", True)
+    }
+
+# -------------------
+# Snapshot store
+# -------------------
+class SnapshotStore:
+    """
+    Holds the published games list together with the data derived from it.
+    Readers take `current()` and keep a consistent snapshot; writers build a
+    complete new snapshot off to the side and swap it in under a lock.
+    If `path` and `load_func` are given, changes to the file made outside the
+    app (e.g. the bulk import CLI) are reloaded before the next update.
+    `load_func` must raise on unreadable files rather than return [].
+    Updates only run on the single job worker, so they never overlap.
+    """
+    def __init__(self, games, to_dict, path=None, load_func=None):
+        self._to_dict = to_dict
+        self._path = path
+        self._load_func = load_func
+        self._lock = threading.Lock()
+        self._saving = False
+        self._file_version = self._current_file_version()
+        self._snapshot = self.build(games, version=0)
+
+    def _current_file_version(self):
+        return file_version(self._path)
+
+    def file_changed(self):
+        """True if the games file was written by someone other than this store."""
+        if self._load_func is None:
+            return False
+        with self._lock:
+            # Our own save in progress is not an outside change
+            return not self._saving and self._current_file_version() != self._file_version
+
+    def reload_if_changed(self):
+        """Publishes the games file as a new snapshot if it changed."""
+        if not self.file_changed():
+            return
+        version = self._current_file_version()
+        games = self._load_func()
+        if not games and self.current().games and version and version[1] > 0:
+            raise ValueError(f"Refusing to replace {len(self.current().games)} games with an empty {self._path}")
+        self.publish(self.build(games, version=self.current().version + 1))
+        self._file_version = version
+
+    def save(self, save_func, games):
+        """Writes games with save_func and records the resulting file version."""
+        with self._lock:
+            self._saving = True
+        try:
+            save_func(games)
+        finally:
+            with self._lock:
+                self._file_version = self._current_file_version()
+                self._saving = False
+
+    def build(self, games, version):
+        games_data = [self._to_dict(g) for g in games]
+        season_totals = build_season_totals(games_data)
+        return Snapshot(
+            version=version,
+            games=tuple(games),
+            season_totals=season_totals,
+            leaderboards=build_leaderboards(season_totals),
+            game_frames=build_game_frames(games_data),
+        )
+
+    def current(self):
+        with self._lock:
+            return self._snapshot
+
+    def publish(self, snapshot):
+        with self._lock:
+            self._snapshot = snapshot
+
+# -------------------
+# Job queue
+# -------------------
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="boxscore-job")
+_jobs = {}
+_jobs_lock = threading.Lock()
+_job_ids = itertools.count(1)
+
+def _set_status(job_id, status, error=None):
+    with _jobs_lock:
+        _jobs[job_id]["status"] = status
+        _jobs[job_id]["error"] = error
+
+def _run_update(job_id, store, transform, save_func):
+    try:
+        store.reload_if_changed()  # never overwrite games written by another process
+        old = store.current()
+        games = list(transform(list(old.games)))
+
+        _set_status(job_id, "saving")
+        store.save(save_func, games)
+
+        _set_status(job_id, "rebuilding")
+        store.publish(store.build(games, version=old.version + 1))
+        _set_status(job_id, "done")
+    except Exception as e:
+        _set_status(job_id, "failed", error=str(e))
+
+def submit_update(store, transform, save_func, label):
+    """
+    Queues an update of the games list. `transform` receives the latest
+    published games list and returns the new one, which is saved with
+    `save_func` and published together with its derived data.
+    Returns the job id.
+    """
+    job_id = next(_job_ids)
+    with _jobs_lock:
+        _jobs[job_id] = {"id": job_id, "label": label, "status": "queued", "error": None}
+    _executor.submit(_run_update, job_id, store, transform, save_func)
+    return job_id
+
+def _run_reload(job_id, store):
+    try:
+        _set_status(job_id, "rebuilding")
+        store.reload_if_changed()
+        _set_status(job_id, "done")
+    except Exception as e:
+        _set_status(job_id, "failed", error=str(e))
+
+def submit_reload(store, label):
+    """Queues a reload of the games file if it was changed outside the app. Returns the job id."""
+    job_id = next(_job_ids)
+    with _jobs_lock:
+        _jobs[job_id] = {"id": job_id, "label": label, "status": "queued", "error": None}
+    _executor.submit(_run_reload, job_id, store)
+    return job_id
+
+def job_status(job_id):
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def recent_jobs():
+    """Returns the most recent jobs, newest first."""
+    with _jobs_lock:
+        return [dict(_jobs[i]) for i in sorted(_jobs, reverse=True)[:MAX_JOBS_SHOWN]]
@@ -4,6 +4,10 @@ import json
 import os
 from game_logic import run_game  # import the extracted function
 from time_arithmetic import time_str_to_seconds, seconds_to_time_str, add_times
+from simulation import simulate_lineup, derive_rates
+from background_jobs import SnapshotStore, submit_update, submit_reload, recent_jobs
+from player_similarity import SimilarityIndex, FEATURES
+from bulk_import import parse_folders, assign_game_ids, find_duplicates
 
 # -------------------
 # Configuration
@@ -140,9 +144,54 @@ def load_games():
     except (json.JSONDecodeError, FileNotFoundError):
         return []
 
+def load_games_strict():
+    """Like load_games, but raises instead of returning [] for a missing or unreadable file."""
+    with open(GAME_FILE, "r") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{GAME_FILE} does not contain a list of games")
+    return [Game.from_dict(entry) for entry in data]
+
 def save_games(games):
-    with open(GAME_FILE, "w") as f:
+    # Write to a temp file first so readers never see a half-written games.json
+    tmp_file = GAME_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
         json.dump([g.to_dict() for g in games], f, indent=2)
+    os.replace(tmp_file, GAME_FILE)
+
+@st.cache_resource
+def get_game_store():
+    """Shared store of the published games snapshot and its derived data."""
+    return SnapshotStore(load_games(), to_dict=lambda g: g.to_dict(), path=GAME_FILE, load_func=load_games_strict)
+
+@st.cache_resource
+def get_similarity_index():
+    """Shared similarity index, synced incrementally with the games list."""
+    return SimilarityIndex()
+
+def end_game(game):
+    """Queues the save of a finished game and the rebuild of derived data."""
+    finished = Game.from_dict(game.to_dict())  # detach from objects the UI keeps editing
+    def add_finished(games):
+        # Number the game against the latest games list, not the UI's possibly stale copy
+        finished.game_id = max((g.game_id for g in games), default=0) + 1
+        return games + [finished]
+    return submit_update(get_game_store(), add_finished, save_games, f"End game '{game.name}'")
+
+def import_games(games_by_path):
+    """Queues all imported games as a single save. Fails if any game is already stored."""
+    games_data = list(games_by_path.values())
+    def add_imported(games):
+        duplicates = find_duplicates(games_by_path, [g.to_dict() for g in games])
+        if duplicates:
+            raise ValueError("Already imported: " + ", ".join(duplicates))
+        imported = assign_game_ids(games_data, [g.game_id for g in games])
+        return games + [Game.from_dict(d) for d in imported]
+    return submit_update(get_game_store(), add_imported, save_games, f"Import {len(games_data)} games")
+
+def delete_game(game_id, name):
+    return submit_update(get_game_store(), lambda games: [g for g in games if g.game_id != game_id],
+                         save_games, f"Delete game '{name}'")
 
 def fmt(val):
         """Formats numbers cleanly."""
@@ -156,38 +205,9 @@ def fmt(val):
 def get_player_total_stat(player_name, stat):
     """
     Returns the aggregated value of a specific stat for a given player across all games.
-    Automatically loads GAME_FILE if it's a path string.
+    Reads the season totals of the published snapshot; MIN is returned in seconds.
     """
-    global GAME_FILE
-
-    # Load the JSON if GAME_FILE is a string path
-    if isinstance(GAME_FILE, str):
-        with open(GAME_FILE, "r", encoding="utf-8") as f:
-            GAME_FILE = json.load(f)
-
-    total = 0
-
-    for game in GAME_FILE:
-        if not isinstance(game, dict):
-            continue  # skip anything malformed
-
-        if not game.get("finished", True):
-            continue
-
-        for p in game.get("players", []):
-            if p.get("PLAYER") == player_name:
-                value = p.get(stat, 0)
-                
-                # Special handling for 'MIN' using time helper
-                if stat == "MIN":
-                    if isinstance(value, str):
-                        value = time_str_to_seconds(value)  # convert "MM:SS" to seconds
-                    elif isinstance(value, (int, float)):
-                        value = value * 60  # convert minutes to seconds
-
-                total += value      
-
-    return total
+    return snapshot.season_totals.get(player_name, {}).get(stat, 0)
 
 
 
@@ -197,8 +217,17 @@ def get_player_total_stat(player_name, stat):
 if "players" not in st.session_state:
     st.session_state.players = load_players()
 
-if "games" not in st.session_state:
-    st.session_state.games = load_games()
+# Pick up games written outside the app (e.g. the bulk import CLI)
+if get_game_store().file_changed() and "reload_job" not in st.session_state:
+    st.session_state.reload_job = submit_reload(get_game_store(), f"Reload {GAME_FILE}")
+elif not get_game_store().file_changed():
+    st.session_state.pop("reload_job", None)
+
+# Sync this session with the latest published snapshot
+snapshot = get_game_store().current()
+if st.session_state.get("games_version") != snapshot.version:
+    st.session_state.games = list(snapshot.games)
+    st.session_state.games_version = snapshot.version
 
 if "current_game" not in st.session_state:
     st.session_state.current_game = None
@@ -213,7 +242,7 @@ if "confirm_end_game" not in st.session_state:
 # Sidebar navigation
 # -------------------
 st.sidebar.title("Navigation")
-page = st.sidebar.radio("Go to", ["Add Game", "Player Stats", "Box Scores"])
+page = st.sidebar.radio("Go to", ["Add Game", "Player Stats", "Box Scores", "Simulation"])
 
 # -------------------
 # Page 1: Add Game
@@ -252,6 +281,26 @@ if page == "Add Game":
         else:
             st.info("No players yet. Admin needs to add players.")
 
+    # Bulk import of past box scores
+    if IS_ADMIN:
+        with st.expander("Bulk Import"):
+            import_folder = st.text_input("Folder with CSV/JSON box scores")
+            if st.button("Import") and import_folder:
+                if not os.path.isdir(import_folder):
+                    st.error(f"'{import_folder}' is not a folder.")
+                else:
+                    imported, errors = parse_folders([import_folder], [p.name for p in st.session_state.players])
+                    errors.update(find_duplicates(imported, [g.to_dict() for g in snapshot.games]))
+                    if errors:
+                        st.error("Nothing imported, fix these files first:")
+                        for path, errs in errors.items():
+                            st.write(f"📄 {path}: " + "; ".join(errs))
+                    elif not imported:
+                        st.info("No box score files found.")
+                    else:
+                        job_id = import_games(imported)
+                        st.success(f"Importing {len(imported)} games in the background (job #{job_id}).")
+
     # Game creation
     if IS_ADMIN:
         if st.session_state.current_game is None:
@@ -285,7 +334,7 @@ if page == "Add Game":
 
                 if st.session_state.selected_players_temp:
                     if st.button("Confirm Players"):
-                        new_game_id = len(st.session_state.games) + 1
+                        new_game_id = max((g.game_id for g in st.session_state.games), default=0) + 1
                         selected_objs = [
                             p for p in st.session_state.players
                             if p.name in st.session_state.selected_players_temp
@@ -300,7 +349,19 @@ if page == "Add Game":
                         st.rerun()
         else:
             # Call the extracted in-game logic
-            run_game(st.session_state.current_game, save_games, save_players)
+            run_game(st.session_state.current_game, end_game, save_players)
+
+    # Background job status
+    jobs = recent_jobs()
+    if jobs:
+        st.markdown("### Background Jobs:")
+        for job in jobs:
+            icon = {"done": "✅", "failed": "❌"}.get(job["status"], "⏳")
+            st.write(f"{icon} #{job['id']} {job['label']}: {job['status']}")
+            if job["error"]:
+                st.error(job["error"])
+        if st.button("Refresh"):
+            st.rerun()
 
     # Display all games
     st.markdown("### All Games:")
@@ -309,10 +370,8 @@ if page == "Add Game":
             col1, col2 = st.columns([3,1])
             col1.write(f"🏀 {g.name} (ID: {g.game_id})")
             if IS_ADMIN and col2.button("Delete", key=f"del_game_{g.game_id}"):
-                st.session_state.games.remove(g)
-                save_games(st.session_state.games)
-                st.success(f"Game '{g.name}' deleted!")
-                st.rerun()
+                job_id = delete_game(g.game_id, g.name)
+                st.success(f"Deleting game '{g.name}' in the background (job #{job_id}).")
     else:
         st.info("No games yet.")
 # -------------------
@@ -321,9 +380,29 @@ if page == "Add Game":
 elif page == "Player Stats":
     st.title("Player Stats")
 
-    view_mode = st.radio("Display Mode", ["Total", "Per Game"], horizontal=True)
+    view_mode = st.radio("Display Mode", ["Total", "Per Game", "Similar Players"], horizontal=True)
+
+    if view_mode == "Similar Players":
+        index = get_similarity_index()
+        if index.version != snapshot.version:
+            index.sync([g.to_dict() for g in snapshot.games], snapshot.version)
+        names, raw_features, _ = index.features()
 
-    if st.session_state.players:
+        if names:
+            col1, col2 = st.columns([3,1])
+            target = col1.selectbox("Player", names)
+            k = col2.number_input("Results", min_value=1, max_value=max(len(names) - 1, 1), value=min(5, max(len(names) - 1, 1)), step=1)
+
+            rows = []
+            for name, distance in [(target, 0.0)] + index.nearest(target, int(k)):
+                row = {"PLAYER": name, "DIST": fmt(distance)}
+                row.update({f: fmt(v) for f, v in zip(FEATURES, raw_features[names.index(name)])})
+                rows.append(row)
+            st.dataframe(pd.DataFrame(rows), use_container_width=True)
+        else:
+            st.info("Not enough minutes played yet to compare players.")
+
+    elif st.session_state.players:
         player_data = []
 
         # Determine total games played (only finished games count)
@@ -527,6 +606,14 @@ elif page == "Player Stats":
 
         st.dataframe(player_data, use_container_width=True)
 
+        # --- Season leaders (totals) ---
+        st.markdown("### Season Leaders:")
+        leader_cols = st.columns(len(snapshot.leaderboards))
+        for col, (stat, leaders) in zip(leader_cols, snapshot.leaderboards.items()):
+            col.markdown(f"**{stat}**")
+            for name, value in leaders:
+                col.write(f"{name}: {fmt(value)}")
+
     else:
         st.info("No players yet. Add some on the 'Add Game' page.")
 
@@ -538,105 +625,53 @@ elif page == "Player Stats":
 elif page == "Box Scores":
     st.title("Box Scores")
 
-    if st.session_state.games:
-        for g in st.session_state.games:
-            if not g.finished:
-                continue  # only show finished games
+    finished_games = [g for g in snapshot.games if g.finished and g.game_id in snapshot.game_frames]
+    if finished_games:
+        for g in finished_games:
             st.markdown(f"### 🏀 {g.name} (ID: {g.game_id})")
+            # Box score rows are precomputed by the background job that published the snapshot
+            st.dataframe(snapshot.game_frames[g.game_id], use_container_width=True)
+    else:
+        st.info("No finished games yet.")
 
-            # Build box-score rows using per-game player objects stored in game.players
-            box_data = []
-            for p in g.players:
-                pts = (p.two_ptm * 2) + (p.three_ptm * 3) + p.ftm
-
-                # Percentages
-                two_fg_pct = (p.two_ptm / p.two_pta * 100) if p.two_pta > 0 else 0
-                three_fg_pct = (p.three_ptm / p.three_pta * 100) if p.three_pta > 0 else 0
-                ft_pct = (p.ftm / p.fta * 100) if p.fta > 0 else 0
-
-                # Combined FG stats
-                fg_makes = p.two_ptm + p.three_ptm
-                fg_attempts = p.two_pta + p.three_pta
-                fg_pct = (fg_makes / fg_attempts * 100) if fg_attempts > 0 else 0
-
-                row = {
-                    "PLAYER": p.name,
-                    "MIN": p.min,
-                    "PTS": pts,
-                    "AST": p.assists,
-                    "REB": p.oreb + p.dreb,
-                    "OREB": p.oreb,
-                    "DREB": p.dreb,
-                    "TO": p.turnovers,
-                    "STL": p.steals,
-                    "BLK": p.blocks,
-                    "FG": f"{fg_makes}-{fg_attempts}",
-                    "FG%": round(fg_pct, 1),
-                    "2PT": f"{p.two_ptm}-{p.two_pta}",
-                    "2FG%": round(two_fg_pct, 1),
-                    "3PT": f"{p.three_ptm}-{p.three_pta}",
-                    "3FG%": round(three_fg_pct, 1),
-                    "FT": f"{p.ftm}-{p.fta}",
-                    "FT%": round(ft_pct, 1),
-                    "+/-": p.plus_minus,
-                    "PF": p.pf
-                }
-                box_data.append(row)
-
-            # --- Calculate team totals ---
-            total_seconds = sum(time_str_to_seconds(p.min) for p in g.players)
-            total_min = seconds_to_time_str(total_seconds)
-            total_pts = sum((p.two_ptm * 2) + (p.three_ptm * 3) + p.ftm for p in g.players)
-            total_ast = sum(p.assists for p in g.players)
-            total_reb = sum(p.oreb + p.dreb for p in g.players)
-            total_oreb = sum(p.oreb for p in g.players)
-            total_dreb = sum(p.dreb for p in g.players)
-            total_to = sum(p.turnovers for p in g.players)
-            total_stl = sum(p.steals for p in g.players)
-            total_blk = sum(p.blocks for p in g.players)
-            total_pf = sum(p.pf for p in g.players)
-            total_plus_minus = sum(p.plus_minus for p in g.players)
-
-            total_two_ptm = sum(p.two_ptm for p in g.players)
-            total_two_pta = sum(p.two_pta for p in g.players)
-            total_three_ptm = sum(p.three_ptm for p in g.players)
-            total_three_pta = sum(p.three_pta for p in g.players)
-            total_ftm = sum(p.ftm for p in g.players)
-            total_fta = sum(p.fta for p in g.players)
-            total_fg_makes = total_two_ptm + total_three_ptm
-            total_fg_attempts = total_two_pta + total_three_pta
-
-            team_fg_pct = (total_fg_makes / total_fg_attempts * 100) if total_fg_attempts > 0 else 0
-            team_2fg_pct = (total_two_ptm / total_two_pta * 100) if total_two_pta > 0 else 0
-            team_3fg_pct = (total_three_ptm / total_three_pta * 100) if total_three_pta > 0 else 0
-            team_ft_pct = (total_ftm / total_fta * 100) if total_fta > 0 else 0
-
-            team_row = {
-                "PLAYER": "👥 TEAM TOTAL",
-                "MIN": total_min,
-                "PTS": total_pts,
-                "AST": total_ast,
-                "REB": total_reb,
-                "OREB": total_oreb,
-                "DREB": total_dreb,
-                "TO": total_to,
-                "STL": total_stl,
-                "BLK": total_blk,
-                "FG": f"{total_fg_makes}-{total_fg_attempts}",
-                "FG%": fmt(team_fg_pct),
-                "2PT": f"{total_two_ptm}-{total_two_pta}",
-                "2FG%": fmt(team_2fg_pct),
-                "3PT": f"{total_three_ptm}-{total_three_pta}",
-                "3FG%": fmt(team_3fg_pct),
-                "FT": f"{total_ftm}-{total_fta}",
-                "FT%": fmt(team_ft_pct),
-                "+/-": total_plus_minus,
-                "PF": total_pf
-            }
-
-            box_data.append(team_row) 
-            # Display DataFrame 
-            df_box = pd.DataFrame(box_data) 
-            st.dataframe(df_box, use_container_width=True)
+# -------------------
+# Page 4: Simulation
+# -------------------
+elif page == "Simulation":
+    st.title("Simulation")
+
+    games_data = [g.to_dict() for g in st.session_state.games]
+    rates, team_rates = derive_rates(games_data)
+
+    if rates:
+        lineup = st.multiselect("Rotation", list(rates.keys()), default=list(rates.keys())[:5])
+        col1, col2, col3, col4 = st.columns(4)
+        pace = col1.number_input("Pace (possessions)", min_value=1, value=max(team_rates["pace"], 1), step=1)
+        n_games = col2.number_input("Simulated games", min_value=100, value=5000, step=500)
+        seed = col3.number_input("Seed", min_value=0, value=0, step=1)
+        workers = col4.number_input("Workers", min_value=1, max_value=os.cpu_count() or 1, value=1, step=1)
+
+        if lineup and st.button("Run Simulation"):
+            result = simulate_lineup(games_data, lineup, pace=int(pace), n_games=int(n_games),
+                                     seed=int(seed), workers=int(workers))
+            team_points = result["team_points"]
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Expected PTS", fmt(team_points.mean()))
+            col2.metric("Std. Dev.", fmt(team_points.std()))
+            col3.metric("10th-90th Pct.", f"{fmt(pd.Series(team_points).quantile(0.1))}-{fmt(pd.Series(team_points).quantile(0.9))}")
+
+            st.markdown("### Team points distribution:")
+            st.bar_chart(pd.Series(team_points.astype(int)).value_counts().sort_index())
+
+            st.markdown("### Expected points per player:")
+            player_points = result["player_points"]
+            df_sim = pd.DataFrame({
+                "PLAYER": result["players"],
+                "PTS": [fmt(v) for v in player_points.mean(axis=0)],
+                "STD": [fmt(v) for v in player_points.std(axis=0)],
+                "MAX": [fmt(v) for v in player_points.max(axis=0)],
+            })
+            st.dataframe(df_sim, use_container_width=True)
     else:
         st.info("No finished games yet.")
@@ -0,0 +1,229 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from stat_archive import min_to_seconds
+
+# -------------------
+# Configuration
+# -------------------
+# Same columns as the run_game stat table
+COLUMNS = ["PLAYER", "2PT MAKE", "2PT MISS", "3PT MAKE", "3PT MISS",
+           "FT MAKE", "FT MISS", "OREB", "DREB", "AST", "TO",
+           "STL", "BLK", "+/-", "PF", "MIN"]
+SIGNED_COLUMNS = ["+/-"]
+EXTENSIONS = (".csv", ".json")
+
+# -------------------
+# Parsing
+# -------------------
+def _normalize_name(name):
+    return " ".join(str(name).split()).casefold()
+
+def _parse_min(value):
+    """Validates a 'MM:SS' string and returns it normalized."""
+    value = str(value).strip()
+    parts = value.split(":")
+    if len(parts) != 2 or not all(part.isdigit() for part in parts) or len(parts[1]) != 2:
+        raise ValueError(f"MIN must be MM:SS, got {value!r}")
+    minutes, seconds = map(int, parts)
+    if seconds >= 60:
+        raise ValueError(f"MIN seconds must be below 60, got {value!r}")
+    return f"{minutes:02d}:{seconds:02d}"
+
+def _parse_int(value, col):
+    try:
+        number = int(str(value).strip() or 0)
+    except ValueError:
+        raise ValueError(f"{col} must be a whole number, got {value!r}")
+    if number < 0 and col not in SIGNED_COLUMNS:
+        raise ValueError(f"{col} must not be negative, got {number}")
+    return number
+
+def _read_rows(path):
+    """Returns (game name, list of row dicts) for a CSV or JSON box score file."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return name, list(csv.DictReader(f))
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        name, data = data.get("name", name), data.get("players", [])
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of player rows")
+    return name, data
+
+def to_player_record(stats, player_name):
+    """Converts a run_game stat row to the per-game player format of games.json."""
+    return {
+        "PLAYER": player_name,
+        "GAMES": 1,  # per-game record
+        "MIN": stats["MIN"],
+        "AST": stats["AST"],
+        "OREB": stats["OREB"],
+        "DREB": stats["DREB"],
+        "TO": stats["TO"],
+        "STL": stats["STL"],
+        "BLK": stats["BLK"],
+        "2PTA": stats["2PT MAKE"] + stats["2PT MISS"],
+        "2PTM": stats["2PT MAKE"],
+        "3PTA": stats["3PT MAKE"] + stats["3PT MISS"],
+        "3PTM": stats["3PT MAKE"],
+        "FTA": stats["FT MAKE"] + stats["FT MISS"],
+        "FTM": stats["FT MAKE"],
+        "+/-": stats["+/-"],
+        "PF": stats["PF"],
+    }
+
+def parse_box_score(path, roster_names):
+    """
+    Parses and validates one box score file.
+    Returns (path, game dict without game_id, list of error messages).
+    """
+    try:
+        return _parse_box_score(path, roster_names)
+    except Exception as e:
+        # Never let one bad file take down the whole import
+        return path, None, [f"Could not parse file: {e}"]
+
+def _parse_box_score(path, roster_names):
+    roster = {_normalize_name(n): n for n in roster_names}
+    errors = []
+    try:
+        name, rows = _read_rows(path)
+    except (OSError, ValueError) as e:
+        return path, None, [str(e)]
+
+    if not rows:
+        return path, None, ["No player rows"]
+
+    players = []
+    seen = set()
+    for line, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append(f"Row {line}: expected an object with the stat columns")
+            continue
+        missing = [col for col in COLUMNS if row.get(col) is None]
+        if missing:
+            errors.append(f"Row {line}: missing columns: {', '.join(missing)}")
+            continue
+        player_name = roster.get(_normalize_name(row.get("PLAYER", "")))
+        if player_name is None:
+            errors.append(f"Row {line}: player {row.get('PLAYER')!r} is not on the roster")
+            continue
+        if player_name in seen:
+            errors.append(f"Row {line}: duplicate player {player_name!r}")
+            continue
+        seen.add(player_name)
+        try:
+            stats = {col: _parse_min(row[col]) if col == "MIN" else _parse_int(row[col], col)
+                     for col in COLUMNS[1:]}
+        except ValueError as e:
+            errors.append(f"Row {line}: {e}")
+            continue
+        players.append(to_player_record(stats, player_name))
+
+    if errors:
+        return path, None, errors
+    return path, {"name": name, "players": players, "finished": True}, []
+
+def find_box_score_files(folders):
+    paths = []
+    for folder in folders:
+        for root, _, files in os.walk(folder):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(EXTENSIONS))
+    return sorted(paths)
+
+def parse_folders(folders, roster_names, workers=None):
+    """
+    Parses all box score files under the given folders in a process pool.
+    Returns ({path: game dict} in file order, {path: errors} for invalid files).
+    """
+    paths = find_box_score_files(folders)
+    roster_names = list(roster_names)
+    if workers == 1 or len(paths) <= 1:
+        results = [parse_box_score(path, roster_names) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(parse_box_score, paths, [roster_names] * len(paths)))
+
+    games = {path: game for path, game, errors in results if not errors}
+    errors = {path: errs for path, _, errs in results if errs}
+    return games, errors
+
+def _player_key(p):
+    if not isinstance(p, dict):
+        return (str(p),)
+    return (p.get("PLAYER", ""), min_to_seconds(p.get("MIN", 0))) + tuple(
+        p.get(col, 0) for col in ["AST", "OREB", "DREB", "TO", "STL", "BLK",
+                                  "2PTA", "2PTM", "3PTA", "3PTM", "FTA", "FTM", "+/-", "PF"])
+
+def game_key(game):
+    """Identifies a game by its name and player rows, ignoring game_id and MIN formatting."""
+    return (game.get("name", ""), tuple(sorted(_player_key(p) for p in game.get("players", []))))
+
+def find_duplicates(new_games, existing_games):
+    """
+    Returns {path: errors} for imported games that are already stored or
+    appear twice in the import. `new_games` is {path: game dict}.
+    """
+    known = {game_key(g): f"stored game {g.get('game_id')}" for g in existing_games}
+    errors = {}
+    for path, game in new_games.items():
+        key = game_key(game)
+        if key in known:
+            errors[path] = [f"'{game['name']}' duplicates {known[key]}"]
+        else:
+            known[key] = f"file {path}"
+    return errors
+
+def assign_game_ids(new_games, existing_ids):
+    """Numbers imported games after the highest existing game_id."""
+    next_id = max(existing_ids, default=0) + 1
+    return [{"game_id": next_id + i, **game} for i, game in enumerate(new_games)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import folders of CSV/JSON box scores into games.json.")
+    parser.add_argument("folders", nargs="+")
+    parser.add_argument("--games", default="games.json")
+    parser.add_argument("--players", default="players.json")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    from background_jobs import file_version
+
+    with open(args.players, "r", encoding="utf-8") as f:
+        roster = [p["PLAYER"] if isinstance(p, dict) else p for p in json.load(f)]
+    games, errors = parse_folders(args.folders, roster, args.workers)
+    for path, errs in errors.items():
+        for err in errs:
+            print(f"{path}: {err}")
+    if errors:
+        raise SystemExit("Nothing imported, fix the errors above first.")
+
+    existing = []
+    version = file_version(args.games)
+    if version:
+        with open(args.games, "r", encoding="utf-8") as f:
+            existing = json.load(f)
+    duplicates = find_duplicates(games, existing)
+    for path, errs in duplicates.items():
+        for err in errs:
+            print(f"{path}: {err}")
+    if duplicates:
+        raise SystemExit("Nothing imported, remove the files above that were already imported.")
+    games = assign_game_ids(list(games.values()), [g["game_id"] for g in existing])
+
+    # All games in one write. Own temp name so a running app's save_games cannot clash with it
+    tmp_file = f"{args.games}.import-{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(existing + games, f, indent=2)
+    if file_version(args.games) != version:
+        os.remove(tmp_file)
+        raise SystemExit(f"{args.games} changed while importing (is the app saving a game?). Nothing imported, try again.")
+    os.replace(tmp_file, args.games)
+    print(f"Imported {len(games)} games. A running app reloads {args.games} on its next page load.")
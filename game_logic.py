@@ -1,10 +1,11 @@
 import streamlit as st
 import pandas as pd
 
-def run_game(current_game, save_games_func, save_players):
+def run_game(current_game, end_game_func, save_players):
     """
     Handles in-game stat tracking.
     Stats are stored per game; player totals are calculated from games.json.
+    end_game_func(game) queues the save of a finished game and returns a job id.
     """
     st.info(f"Game '{current_game.name}' is currently running.")
 
@@ -94,8 +95,7 @@ def run_game(current_game, save_games_func, save_players):
                     p.games = 1  # per-game record
 
                 current_game.finished = True
-                st.session_state.games.append(current_game)
-                save_games_func(st.session_state.games)
+                job_id = end_game_func(current_game)
 
                 # Clear session state
                 st.session_state.current_game = None
@@ -103,7 +103,7 @@ def run_game(current_game, save_games_func, save_players):
                 st.session_state.selected_stat = None
                 st.session_state.confirm_end_game = False
 
-                st.success("Game ended and stats saved!")
+                st.success(f"Game ended! Stats are being saved in the background (job #{job_id}).")
         with col2:
             if st.button("❌ Cancel"):
                 st.session_state.confirm_end_game = False
@@ -0,0 +1,124 @@
+import json
+import threading
+import numpy as np
+from stat_archive import min_to_seconds
+
+# -------------------
+# Configuration
+# -------------------
+# Raw totals tracked per player; MIN in seconds
+TOTAL_STATS = ["GAMES", "MIN", "AST", "OREB", "DREB", "TO", "STL", "BLK",
+               "2PTA", "2PTM", "3PTA", "3PTM", "FTA", "FTM", "+/-", "PF"]
+T = {stat: i for i, stat in enumerate(TOTAL_STATS)}
+
+# Counting stats used as features, each per game and per 36 minutes
+FEATURE_STATS = ["PTS", "REB", "AST", "TO", "STL", "BLK", "2PTA", "3PTA", "FTA", "PF"]
+FEATURES = ["MIN/G"] + [f"{s}/G" for s in FEATURE_STATS] + [f"{s}/36" for s in FEATURE_STATS]
+
+MIN_SECONDS = 10 * 60  # players below this total are left out of the index
+
+# -------------------
+# Similarity index
+# -------------------
+class SimilarityIndex:
+    """
+    Per-player totals matrix that is updated one game at a time and turned
+    into a normalized feature matrix for k-nearest-neighbor queries.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.names = []
+        self._lookup = {}
+        self._totals = np.zeros((0, len(TOTAL_STATS)))
+        self.version = None  # snapshot version the index was last synced with
+        self._fingerprints = {}  # game_id -> fingerprint of the game that was added
+        self._features = None  # cached result of _build_features
+
+    def _row(self, name):
+        if name not in self._lookup:
+            self._lookup[name] = len(self.names)
+            self.names.append(name)
+            if len(self.names) > len(self._totals):
+                # Grow by doubling so adding players stays cheap
+                grown = np.zeros((max(2 * len(self._totals), 16), len(TOTAL_STATS)))
+                grown[:len(self._totals)] = self._totals
+                self._totals = grown
+        return self._lookup[name]
+
+    @staticmethod
+    def fingerprint(game):
+        """Content key of a game, so a reused game_id is not mistaken for the old game."""
+        return json.dumps(game.get("players", []), sort_keys=True)
+
+    def add_game(self, game):
+        """Adds the player rows of one finished game dict to the totals."""
+        if not game.get("finished", True) or game["game_id"] in self._fingerprints:
+            return
+        for p in game.get("players", []):
+            idx = self._row(p.get("PLAYER", ""))
+            row = self._totals[idx]
+            for stat in TOTAL_STATS:
+                row[T[stat]] += min_to_seconds(p.get(stat, 0)) if stat == "MIN" else p.get(stat, 0)
+        self._fingerprints[game["game_id"]] = self.fingerprint(game)
+        self._features = None
+
+    def sync(self, games_data, version):
+        """
+        Brings the index up to date with a games list: new finished games are
+        added incrementally, a full rebuild only happens if a game that was
+        already added is gone or its contents changed. Does nothing if the
+        index was already synced with this snapshot version.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            current = {g["game_id"]: g for g in games_data if g.get("finished", True)}
+            if any(gid not in current or self.fingerprint(current[gid]) != fp
+                   for gid, fp in self._fingerprints.items()):
+                self._reset()
+            for game in games_data:
+                self.add_game(game)
+            self.version = version
+
+    def _build_features(self):
+        t = self._totals[:len(self.names)]
+        keep = t[:, T["MIN"]] >= MIN_SECONDS
+        t = t[keep]
+        names = [name for name, k in zip(self.names, keep) if k]
+        if not names:
+            empty = np.zeros((0, len(FEATURES)))
+            return names, empty, empty
+
+        counts = np.column_stack([
+            t[:, T["2PTM"]] * 2 + t[:, T["3PTM"]] * 3 + t[:, T["FTM"]],
+            t[:, T["OREB"]] + t[:, T["DREB"]],
+            t[:, T["AST"]], t[:, T["TO"]], t[:, T["STL"]], t[:, T["BLK"]],
+            t[:, T["2PTA"]], t[:, T["3PTA"]], t[:, T["FTA"]], t[:, T["PF"]],
+        ])
+        games = t[:, T["GAMES"]:T["GAMES"] + 1]
+        minutes = t[:, T["MIN"]:T["MIN"] + 1] / 60
+        raw = np.hstack([minutes / games, counts / games, counts / minutes * 36])
+
+        std = raw.std(axis=0)
+        std[std == 0] = 1  # constant columns carry no information
+        return names, raw, (raw - raw.mean(axis=0)) / std
+
+    def features(self):
+        """Returns (names, raw feature matrix, normalized feature matrix), cached between games."""
+        with self._lock:
+            if self._features is None:
+                self._features = self._build_features()
+            return self._features
+
+    def nearest(self, player_name, k=5):
+        """Returns the k most similar players as [(name, distance), ...], closest first."""
+        names, _, z = self.features()
+        if player_name not in names:
+            return []
+        target = z[names.index(player_name)]
+        dist = np.sqrt(((z - target) ** 2).sum(axis=1))
+        order = [i for i in np.argsort(dist) if names[i] != player_name][:k]
+        return [(names[i], float(dist[i])) for i in order]
@@ -0,0 +1,185 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from stat_archive import min_to_seconds
+
+# -------------------
+# Configuration
+# -------------------
+FT_TRIP_ATTEMPTS = 2         # free throws per simulated trip to the line
+FT_POSSESSION_FACTOR = 1 / FT_TRIP_ATTEMPTS  # trips = FTA / 2, so simulated FTA matches history
+PRIOR_ATTEMPTS = 10          # pseudo-attempts at the team rate for shooting percentages
+MAX_ATTEMPTS = 6             # shots per possession (first shot + offensive rebounds)
+CHUNK_SIZE = 500             # simulated games per job, fixed so results do not depend on workers
+PARALLEL_MIN_GAMES = 20000   # smaller runs are faster without starting a process pool
+MAX_OREB_RATE = 0.9          # cap for the lineup's offensive rebound rate
+
+# Possession outcomes, in the column order of the outcome matrices
+OUTCOMES = ["TO", "2PT", "3PT", "FT"]
+OUTCOME_POINTS = np.array([0, 2, 3, 0])
+
+STAT_KEYS = ["GAMES", "MIN", "OREB", "TO", "2PTA", "2PTM", "3PTA", "3PTM", "FTA", "FTM"]
+
+# -------------------
+# Rates
+# -------------------
+def aggregate_player_stats(games):
+    """Sums the stats of every player over all finished games (MIN in seconds)."""
+    totals = {}
+    for game in games:
+        if not isinstance(game, dict):
+            continue  # skip anything malformed
+        if not game.get("finished", True):
+            continue
+        for p in game.get("players", []):
+            t = totals.setdefault(p.get("PLAYER", ""), {k: 0 for k in STAT_KEYS})
+            for k in STAT_KEYS:
+                t[k] += min_to_seconds(p.get(k, 0)) if k == "MIN" else p.get(k, 0)
+    return totals
+
+def _possessions_used(t):
+    return t["2PTA"] + t["3PTA"] + FT_POSSESSION_FACTOR * t["FTA"] + t["TO"]
+
+def _shrunk_pct(makes, attempts, team_pct):
+    return (makes + PRIOR_ATTEMPTS * team_pct) / (attempts + PRIOR_ATTEMPTS)
+
+def derive_rates(games):
+    """
+    Derives per-possession rates for every player from the games data.
+    Returns (player rates, team rates). Shooting percentages are shrunk
+    towards the team average so small samples do not produce 0% or 100%.
+    Usage and offensive rebounding are per minute on court, so bench players
+    keep their real share inside a lineup.
+    """
+    totals = aggregate_player_stats(games)
+    team = {k: sum(t[k] for t in totals.values()) for k in STAT_KEYS}
+    n_games = sum(1 for g in games if isinstance(g, dict) and g.get("finished", True))
+
+    team_pct = {
+        "2PT": team["2PTM"] / team["2PTA"] if team["2PTA"] > 0 else 0,
+        "3PT": team["3PTM"] / team["3PTA"] if team["3PTA"] > 0 else 0,
+        "FT": team["FTM"] / team["FTA"] if team["FTA"] > 0 else 0,
+    }
+    misses = (team["2PTA"] - team["2PTM"]) + (team["3PTA"] - team["3PTM"])
+    team_poss = _possessions_used(team) - team["OREB"]
+    team_minutes = team["MIN"] / 60
+    team_rates = {
+        "oreb_rate": team["OREB"] / misses if misses > 0 else 0,
+        "oreb_per_min": team["OREB"] / team_minutes if team_minutes > 0 else 0,
+        "pace": round(team_poss / n_games) if n_games > 0 else 0,
+        **{f"pct_{k}": v for k, v in team_pct.items()},
+    }
+
+    rates = {}
+    for name, t in totals.items():
+        poss = _possessions_used(t)
+        minutes = t["MIN"] / 60
+        if minutes == 0 or poss == 0:
+            continue
+        rates[name] = {
+            "minutes": minutes,
+            "usage": poss / minutes,  # possessions used per minute on court
+            "oreb_per_min": t["OREB"] / minutes,
+            "p_TO": t["TO"] / poss,
+            "p_2PT": t["2PTA"] / poss,
+            "p_3PT": t["3PTA"] / poss,
+            "p_FT": FT_POSSESSION_FACTOR * t["FTA"] / poss,
+            "pct_2PT": _shrunk_pct(t["2PTM"], t["2PTA"], team_pct["2PT"]),
+            "pct_3PT": _shrunk_pct(t["3PTM"], t["3PTA"], team_pct["3PT"]),
+            "pct_FT": _shrunk_pct(t["FTM"], t["FTA"], team_pct["FT"]),
+        }
+    return rates, team_rates
+
+def lineup_oreb_rate(rates, team_rates, lineup):
+    """
+    Offensive rebound rate of a lineup: the team rate scaled by how the
+    lineup's minute-weighted OREB per minute compares to the team's.
+    """
+    if team_rates["oreb_per_min"] == 0:
+        return 0.0
+    minutes = sum(rates[name]["minutes"] for name in lineup)
+    orebs = sum(rates[name]["oreb_per_min"] * rates[name]["minutes"] for name in lineup)
+    rate = team_rates["oreb_rate"] * (orebs / minutes) / team_rates["oreb_per_min"]
+    return min(rate, MAX_OREB_RATE)
+
+def lineup_arrays(rates, team_rates, lineup):
+    """Packs the rates of a lineup into arrays for the simulator."""
+    missing = [name for name in lineup if name not in rates]
+    if missing:
+        raise ValueError(f"No finished games with possessions for: {', '.join(missing)}")
+    usage = np.array([rates[name]["usage"] for name in lineup])
+    outcome_p = np.array([[rates[name][f"p_{o}"] for o in OUTCOMES] for name in lineup])
+    pct = np.array([[0.0] + [rates[name][f"pct_{o}"] for o in OUTCOMES[1:]] for name in lineup])
+    return {
+        "usage_share": usage / usage.sum(),
+        "outcome_cdf": np.cumsum(outcome_p / outcome_p.sum(axis=1, keepdims=True), axis=1),
+        "pct": pct,
+        "oreb_rate": lineup_oreb_rate(rates, team_rates, lineup),
+    }
+
+# -------------------
+# Simulation
+# -------------------
+def simulate_chunk(arrays, pace, n_games, seed_seq):
+    """
+    Simulates n_games games of `pace` possessions each, all possessions at once.
+    Only offensive-rebound rounds are iterated, never single possessions.
+    Returns points per player as an (n_games, n_players) array.
+    """
+    rng = np.random.default_rng(seed_seq)
+    n_players = len(arrays["usage_share"])
+    shape = (n_games, pace)
+    game_idx = np.arange(n_games)[:, None]
+    points = np.zeros(n_games * n_players)
+    active = np.ones(shape, dtype=bool)
+
+    for _ in range(MAX_ATTEMPTS):
+        shooter = rng.choice(n_players, size=shape, p=arrays["usage_share"])
+        u = rng.random(shape)
+        outcome = (u[..., None] > arrays["outcome_cdf"][shooter]).sum(axis=-1)
+        outcome = np.minimum(outcome, len(OUTCOMES) - 1)  # guard against cdf rounding
+        pct = arrays["pct"][shooter, outcome]
+
+        is_ft = outcome == OUTCOMES.index("FT")
+        made = rng.random(shape) < pct
+        pts = np.where(is_ft, rng.binomial(FT_TRIP_ATTEMPTS, pct), OUTCOME_POINTS[outcome] * made) * active
+
+        flat = (game_idx * n_players + shooter).ravel()
+        points += np.bincount(flat, weights=pts.ravel(), minlength=n_games * n_players)
+
+        missed_shot = active & ~made & (outcome != OUTCOMES.index("TO")) & ~is_ft
+        active = missed_shot & (rng.random(shape) < arrays["oreb_rate"])
+        if not active.any():
+            break
+
+    return points.reshape(n_games, n_players)
+
+def simulate_lineup(games, lineup, pace=None, n_games=1000, seed=0, workers=1):
+    """
+    Simulates n_games games for a lineup (list of player names) at a given pace
+    (possessions per game, defaults to the historical average).
+    The same seed gives the same result for any number of workers. The
+    process pool is only used for runs of at least PARALLEL_MIN_GAMES games.
+    """
+    rates, team_rates = derive_rates(games)
+    arrays = lineup_arrays(rates, team_rates, lineup)
+    pace = int(pace or team_rates["pace"])
+    if pace <= 0:
+        raise ValueError("Pace must be positive")
+
+    sizes = [min(CHUNK_SIZE, n_games - start) for start in range(0, n_games, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(arrays, pace, size, s) for size, s in zip(sizes, seeds)]
+
+    if workers > 1 and n_games >= PARALLEL_MIN_GAMES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(simulate_chunk, *zip(*args)))
+    else:
+        chunks = [simulate_chunk(*a) for a in args]
+
+    player_points = np.concatenate(chunks) if chunks else np.zeros((0, len(lineup)))
+    return {
+        "players": list(lineup),
+        "pace": pace,
+        "player_points": player_points,
+        "team_points": player_points.sum(axis=1),
+    }
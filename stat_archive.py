@@ -0,0 +1,266 @@
+import json
+import os
+import shutil
+import numpy as np
+from time_arithmetic import time_str_to_seconds, seconds_to_time_str
+
+# -------------------
+# Configuration
+# -------------------
+ARCHIVE_DIR = "games_archive"
+CURRENT_FILE = "CURRENT"    # name of the published version directory, e.g. "v3"
+STATS_FILE = "stats.npy"    # (rows, columns) int32, column-major
+INDEX_FILE = "index.npy"    # (games, 3) int64: game_id, start row, stop row
+META_FILE = "meta.json"     # string tables: player names, game names, finished flags
+MIN_FORMAT_FILE = "min_format.npy"  # (rows,) int8: how MIN was written, see MIN_FORMATS
+
+# How a MIN value was written in games.json, so exports reproduce it
+MIN_FORMATS = ["M:SS", "MM:SS", "minutes"]
+
+# Column order of the stats matrix. PLAYER holds an index into the player
+# string table, MIN holds seconds played.
+COLUMNS = ["PLAYER", "GAMES", "MIN", "AST", "OREB", "DREB", "TO", "STL", "BLK",
+           "2PTA", "2PTM", "3PTA", "3PTM", "FTA", "FTM", "+/-", "PF"]
+COL = {name: i for i, name in enumerate(COLUMNS)}
+
+# -------------------
+# Helper functions
+# -------------------
+def min_to_seconds(value):
+    """Converts a MIN value ('MM:SS' string or whole minutes) to seconds."""
+    if isinstance(value, str):
+        return time_str_to_seconds(value)
+    if isinstance(value, (int, float)):
+        return int(value * 60)
+    return 0
+
+def min_format(value):
+    """Returns the MIN_FORMATS code of a MIN value."""
+    if isinstance(value, (int, float)) and value == int(value):
+        return MIN_FORMATS.index("minutes")
+    minutes = str(value).split(":")[0].strip()
+    return MIN_FORMATS.index("MM:SS" if len(minutes) > 1 and minutes.startswith("0") else "M:SS")
+
+def format_min(seconds, fmt_code):
+    """Turns seconds back into a MIN value in the given MIN_FORMATS code."""
+    fmt = MIN_FORMATS[fmt_code]
+    if fmt == "minutes":
+        return seconds // 60
+    if fmt == "MM:SS":
+        return f"{seconds // 60:02d}:{seconds % 60:02d}"
+    return seconds_to_time_str(seconds)
+
+def _player_entry(p):
+    """Player rows may be bare names (see Player.from_dict); those have all stats at 0."""
+    if isinstance(p, str):
+        return {"PLAYER": p}
+    if isinstance(p, dict):
+        return p
+    raise ValueError(f"Unexpected player data format: {p}")
+
+def _stat_row(p, player_idx):
+    row = [player_idx]
+    for col in COLUMNS[1:]:
+        if col == "MIN":
+            row.append(min_to_seconds(p.get("MIN", 0)))
+        else:
+            row.append(int(p.get(col, 0)))
+    return row
+
+# -------------------
+# Writing
+# -------------------
+def write_archive(games, path=ARCHIVE_DIR):
+    """
+    Writes a list of game dicts (the games.json format) to a columnar archive.
+    Rows of a game are stored contiguously so a box score is a single slice.
+    The archive is an offline export: the app does not update it on save.
+
+    Each write goes to a new version directory that is published by
+    replacing CURRENT, so open StatArchive instances keep their files.
+    Player rows are normalized to COLUMNS: missing stats become 0, other
+    keys are dropped and bare-name rows are exported as full rows.
+    """
+    seen = set()
+    duplicates = set()
+    for g in games:
+        if isinstance(g, dict):
+            (duplicates if g["game_id"] in seen else seen).add(g["game_id"])
+    if duplicates:
+        raise ValueError(f"Duplicate game_id(s): {sorted(duplicates)}")
+
+    player_names = []
+    player_lookup = {}
+    rows = []
+    min_formats = []
+    index = []
+    game_meta = []
+
+    for game in games:
+        if not isinstance(game, dict):
+            continue  # skip anything malformed
+        start = len(rows)
+        for p in game.get("players", []):
+            p = _player_entry(p)
+            name = p.get("PLAYER", "")
+            if name not in player_lookup:
+                player_lookup[name] = len(player_names)
+                player_names.append(name)
+            rows.append(_stat_row(p, player_lookup[name]))
+            min_formats.append(min_format(p.get("MIN", 0)))
+        index.append([game["game_id"], start, len(rows)])
+        game_meta.append({"name": game.get("name", ""), "finished": game.get("finished", True)})
+
+    stats = np.asfortranarray(np.array(rows, dtype=np.int32).reshape(len(rows), len(COLUMNS)))
+    index = np.array(index, dtype=np.int64).reshape(len(index), 3)
+
+    os.makedirs(path, exist_ok=True)
+    versions = _versions(path)
+    version = f"v{max(versions, default=0) + 1}"
+    tmp_dir = os.path.join(path, f"{version}.tmp-{os.getpid()}")
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, STATS_FILE), stats)
+    np.save(os.path.join(tmp_dir, INDEX_FILE), index)
+    np.save(os.path.join(tmp_dir, MIN_FORMAT_FILE), np.array(min_formats, dtype=np.int8))
+    with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"columns": COLUMNS, "players": player_names, "games": game_meta}, f, indent=2)
+    os.rename(tmp_dir, os.path.join(path, version))
+
+    # Publish the new version in one step
+    tmp_current = os.path.join(path, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(tmp_current, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_current, os.path.join(path, CURRENT_FILE))
+
+    # Keep the previous version for readers that just opened it, drop older ones
+    for old in sorted(versions)[:-1]:
+        shutil.rmtree(os.path.join(path, f"v{old}"), ignore_errors=True)
+
+def _versions(path):
+    return [int(d[1:]) for d in os.listdir(path) if d.startswith("v") and d[1:].isdigit()]
+
+def json_to_archive(json_path, path=ARCHIVE_DIR):
+    """Builds an archive from a games.json file."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    write_archive(data if isinstance(data, list) else [], path)
+
+def archive_to_json(path, json_path):
+    """Exports an archive back to the games.json format."""
+    archive = StatArchive(path)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(archive.to_games(), f, indent=2)
+
+# -------------------
+# Reading
+# -------------------
+class StatArchive:
+    """
+    Read-only view of an archive. The stats matrix is memory-mapped, so
+    game and column lookups are slices of the file without copying.
+    """
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            self.version = f.read().strip()
+        version_dir = os.path.join(path, self.version)
+        self.stats = np.load(os.path.join(version_dir, STATS_FILE), mmap_mode="r")
+        self.index = np.load(os.path.join(version_dir, INDEX_FILE), mmap_mode="r")
+        self.min_formats = np.load(os.path.join(version_dir, MIN_FORMAT_FILE), mmap_mode="r")
+        with open(os.path.join(version_dir, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("columns") != COLUMNS:
+            raise ValueError(f"Unexpected archive columns: {meta.get('columns')}")
+        self.player_names = meta["players"]
+        self.games = meta["games"]
+        self._rows_by_game = {int(gid): (int(start), int(stop)) for gid, start, stop in self.index}
+        self._player_lookup = {name: i for i, name in enumerate(self.player_names)}
+
+    def game_ids(self):
+        return [int(gid) for gid in self.index[:, 0]]
+
+    def column(self, stat):
+        """Returns one stat column for every row (contiguous view)."""
+        return self.stats[:, COL[stat]]
+
+    def game_rows(self, game_id):
+        """Returns the stat rows of a single game as a view."""
+        start, stop = self._rows_by_game[game_id]
+        return self.stats[start:stop]
+
+    def season_rows(self, finished_only=True):
+        """
+        Returns the stat rows of all (finished) games. Finished games usually
+        form one contiguous block, in which case this is a view as well.
+        """
+        if not finished_only:
+            return self.stats
+        finished = [i for i, g in enumerate(self.games) if g.get("finished", True)]
+        if not finished:
+            return self.stats[0:0]
+        first, last = finished[0], finished[-1]
+        if last - first + 1 == len(finished):
+            return self.stats[int(self.index[first, 1]):int(self.index[last, 2])]
+        return np.concatenate([self.stats[int(self.index[i, 1]):int(self.index[i, 2])] for i in finished])
+
+    def player_total_stat(self, player_name, stat, finished_only=True):
+        """Same result as get_player_total_stat, MIN in seconds."""
+        idx = self._player_lookup.get(player_name)
+        if idx is None:
+            return 0
+        rows = self.season_rows(finished_only)
+        mask = rows[:, COL["PLAYER"]] == idx
+        return int(rows[mask, COL[stat]].sum())
+
+    def player_totals(self, finished_only=True):
+        """Returns {player name: {stat: total}} for all players in one pass per column."""
+        rows = self.season_rows(finished_only)
+        player_idx = rows[:, COL["PLAYER"]]
+        sums = {
+            stat: np.bincount(player_idx, weights=rows[:, COL[stat]], minlength=len(self.player_names))
+            for stat in COLUMNS[1:]
+        }
+        return {
+            name: {stat: int(sums[stat][i]) for stat in COLUMNS[1:]}
+            for i, name in enumerate(self.player_names)
+            if sums["GAMES"][i] > 0
+        }
+
+    def box_score(self, game_id):
+        """Returns the player dicts of one game in the games.json format."""
+        start, stop = self._rows_by_game[game_id]
+        players = []
+        for row, fmt_code in zip(self.stats[start:stop], self.min_formats[start:stop]):
+            p = {"PLAYER": self.player_names[row[COL["PLAYER"]]]}
+            for col in COLUMNS[1:]:
+                value = int(row[COL[col]])
+                p[col] = format_min(value, int(fmt_code)) if col == "MIN" else value
+            players.append(p)
+        return players
+
+    def to_games(self):
+        """Returns all games in the games.json format."""
+        return [
+            {
+                "game_id": gid,
+                "name": meta["name"],
+                "players": self.box_score(gid),
+                "finished": meta["finished"],
+            }
+            for gid, meta in zip(self.game_ids(), self.games)
+        ]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert between games.json and the columnar stat archive.")
+    parser.add_argument("direction", choices=["to-archive", "to-json"])
+    parser.add_argument("--json", default="games.json")
+    parser.add_argument("--archive", default=ARCHIVE_DIR)
+    args = parser.parse_args()
+
+    if args.direction == "to-archive":
+        json_to_archive(args.json, args.archive)
+    else:
+        archive_to_json(args.archive, args.json)